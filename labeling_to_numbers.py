@@ -1,42 +1,47 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 import platform
+from functools import lru_cache
 
 # 한글 폰트 설정
 def setup_korean_font():
     """
     운영체제별로 한글 폰트를 설정합니다.
+    matplotlib 초기화 비용이 크므로 모듈 import 시점이 아니라 시각화할 때만 호출합니다.
     """
+    import matplotlib.pyplot as plt
+
     system = platform.system()
     
     if system == 'Windows':
-        plt.rcParams['font.family'] = 'Malgun Gothic'
+        font_family = 'Malgun Gothic'
     elif system == 'Darwin':  # macOS
-        plt.rcParams['font.family'] = 'AppleGothic'
+        font_family = 'AppleGothic'
     else:  # Linux
-        plt.rcParams['font.family'] = 'DejaVu Sans'
+        font_family = 'DejaVu Sans'
     
+    # 이미 설정된 경우 다시 지정하지 않습니다.
+    if plt.rcParams['font.family'] != [font_family]:
+        plt.rcParams['font.family'] = font_family
     plt.rcParams['axes.unicode_minus'] = False  # 마이너스 기호 깨짐 방지
 
-# 폰트 설정 실행
-setup_korean_font()
+# 각 음이름에 숫자를 매핑합니다.
+note_map = {
+    'C': 0, 'C#': 1, 'D': 2, 'D#': 3, 'E': 4, 'F': 5, 
+    'F#': 6, 'G': 7, 'G#': 8, 'A': 9, 'A#': 10, 'B': 11
+}
 
+@lru_cache(maxsize=256)
 def midi_note_to_key_number(note):
     """
     MIDI 음표 문자열(예: 'A0', 'C4')을 0-87 범위의 피아노 건반 번호로 변환합니다.
     A0가 0번, C8이 87번 건반에 해당합니다.
+    입력 종류가 적으므로 한 번 계산한 결과는 캐시해 두고 재사용합니다.
     """
     # 음이름과 옥타브를 분리합니다.
     note_name = note[:-1]
     octave = int(note[-1])
     
-    # 각 음이름에 숫자를 매핑합니다.
-    note_map = {
-        'C': 0, 'C#': 1, 'D': 2, 'D#': 3, 'E': 4, 'F': 5, 
-        'F#': 6, 'G': 7, 'G#': 8, 'A': 9, 'A#': 10, 'B': 11
-    }
-    
     # 표준 MIDI 번호를 계산합니다.
     midi_number = (octave + 1) * 12 + note_map[note_name]
     
@@ -49,122 +54,159 @@ def generate_all_piano_keys():
     """
     88개 피아노 건반의 모든 음표와 라벨을 생성합니다.
     """
-    notes = []
-    labels = []
-    
     # 88개 건반 생성 (A0부터 C8까지)
-    octaves = range(0, 9)  # 0옥타브부터 8옥타브까지
-    note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-    
-    for octave in octaves:
-        for note_name in note_names:
-            note = f"{note_name}{octave}"
-            try:
-                label = midi_note_to_key_number(note)
-                if 0 <= label <= 87:  # 88건반 범위 내에서만
-                    notes.append(note)
-                    labels.append(label)
-            except:
-                continue
-    
-    return notes, labels
+    octaves = np.arange(9)  # 0옥타브부터 8옥타브까지
+    # 음이름과 반음 번호는 note_map에서 가져와 midi_note_to_key_number와 같은 규칙을 따릅니다.
+    note_names = np.array(list(note_map.keys()))
+    semitones = np.array(list(note_map.values()))
+
+    # 옥타브 x 음이름 격자에서 라벨을 한 번에 계산합니다. (파이썬 반복문 없이 NumPy 연산)
+    keys = ((octaves[:, None] + 1) * 12 + semitones[None, :] - 21).ravel()
+    # 음표 문자열도 f-string 반복 대신 np.char.add 한 번으로 이어 붙입니다. (예: 'C#' + '4' → 'C#4')
+    notes = np.char.add(np.tile(note_names, len(octaves)), np.repeat(octaves.astype(str), len(note_names)))
+
+    mask = (keys >= 0) & (keys <= 87)  # 88건반 범위 내에서만
 
+    return notes[mask].tolist(), keys[mask].tolist()
+
+def build_label_maps():
+    """
+    모델 학습용 (note_to_label, label_to_note) 딕셔너리를 DataFrame 없이 바로 생성합니다.
+    """
+    notes, labels = generate_all_piano_keys()
+    return dict(zip(notes, labels)), dict(zip(labels, notes))
+
+# 모델 학습용 매핑 딕셔너리 (A0=0 ~ C8=87)
+# 값이 고정되어 있으므로 build_label_maps()의 결과를 소스에 상수로 고정해 두어, import 시 계산 비용이 없습니다.
+# 매핑 규칙을 바꾸면 build_label_maps()의 출력으로 이 상수도 함께 갱신해야 합니다.
+note_to_label = {
+    'A0': 0, 'A#0': 1, 'B0': 2,
+    'C1': 3, 'C#1': 4, 'D1': 5, 'D#1': 6, 'E1': 7, 'F1': 8, 'F#1': 9, 'G1': 10, 'G#1': 11, 'A1': 12, 'A#1': 13, 'B1': 14,
+    'C2': 15, 'C#2': 16, 'D2': 17, 'D#2': 18, 'E2': 19, 'F2': 20, 'F#2': 21, 'G2': 22, 'G#2': 23, 'A2': 24, 'A#2': 25, 'B2': 26,
+    'C3': 27, 'C#3': 28, 'D3': 29, 'D#3': 30, 'E3': 31, 'F3': 32, 'F#3': 33, 'G3': 34, 'G#3': 35, 'A3': 36, 'A#3': 37, 'B3': 38,
+    'C4': 39, 'C#4': 40, 'D4': 41, 'D#4': 42, 'E4': 43, 'F4': 44, 'F#4': 45, 'G4': 46, 'G#4': 47, 'A4': 48, 'A#4': 49, 'B4': 50,
+    'C5': 51, 'C#5': 52, 'D5': 53, 'D#5': 54, 'E5': 55, 'F5': 56, 'F#5': 57, 'G5': 58, 'G#5': 59, 'A5': 60, 'A#5': 61, 'B5': 62,
+    'C6': 63, 'C#6': 64, 'D6': 65, 'D#6': 66, 'E6': 67, 'F6': 68, 'F#6': 69, 'G6': 70, 'G#6': 71, 'A6': 72, 'A#6': 73, 'B6': 74,
+    'C7': 75, 'C#7': 76, 'D7': 77, 'D#7': 78, 'E7': 79, 'F7': 80, 'F#7': 81, 'G7': 82, 'G#7': 83, 'A7': 84, 'A#7': 85, 'B7': 86,
+    'C8': 87,
+}
+label_to_note = {label: note for note, label in note_to_label.items()}
+
+@lru_cache(maxsize=1)
 def create_labeling_dataframe():
     """
     라벨링 데이터를 DataFrame으로 생성하여 시각적으로 확인할 수 있게 합니다.
+    결과가 항상 같으므로 한 번만 생성하여 캐시합니다. (반환된 DataFrame을 직접 수정하지 마세요)
     """
     notes, labels = generate_all_piano_keys()
     
     df = pd.DataFrame({
         'Note': notes,
-        'Label': labels,
-        'MIDI_Number': [label + 21 for label in labels],  # 원래 MIDI 번호도 표시
-        'Octave': [int(note[-1]) for note in notes],
-        'Note_Name': [note[:-1] for note in notes]
+        'Label': np.asarray(labels, dtype=np.int8)
     })
+
+    # 나머지 열은 행 단위 반복 대신 벡터화된 연산으로 채웁니다.
+    df['MIDI_Number'] = df['Label'].to_numpy().astype(np.int16) + 21  # 원래 MIDI 번호도 표시
+    df['Octave'] = df['Note'].str[-1].astype(np.int8)
+    df['Note_Name'] = df['Note'].str[:-1]
     
     return df
 
-def visualize_piano_mapping():
+def visualize_piano_mapping(df=None):
     """
     피아노 건반 매핑을 시각화합니다.
+    이미 생성된 라벨링 DataFrame을 넘기면 다시 만들지 않고 그대로 사용합니다.
     """
-    df = create_labeling_dataframe()
+    import matplotlib.pyplot as plt
+
+    # 폰트 설정 실행
+    setup_korean_font()
+
+    df = df if df is not None else create_labeling_dataframe()
     
-    # 흑건과 백건 구분
-    black_keys = ['C#', 'D#', 'F#', 'G#', 'A#']
-    df['Key_Type'] = df['Note_Name'].apply(lambda x: 'Black' if x in black_keys else 'White')
+    # 흑건과 백건 구분 (원본 DataFrame은 수정하지 않습니다)
+    black_keys = {'C#', 'D#', 'F#', 'G#', 'A#'}
+    is_black = df['Note_Name'].isin(black_keys).to_numpy()
+    df = df.assign(Key_Type=np.where(is_black, 'Black', 'White'))
     
-    plt.figure(figsize=(15, 8))
+    # 2x2 서브플롯을 한 번에 생성합니다.
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 8), dpi=100)  # 래스터화된 요소가 과도하게 샘플링되지 않도록 dpi 고정
     
     # 서브플롯 1: 전체 건반 분포
-    plt.subplot(2, 2, 1)
-    colors = ['black' if key_type == 'Black' else 'white' for key_type in df['Key_Type']]
-    edge_colors = ['white' if key_type == 'Black' else 'black' for key_type in df['Key_Type']]
+    colors = np.where(is_black, 'black', 'white')
+    edge_colors = np.where(is_black, 'white', 'black')
     
-    plt.scatter(df['Label'], [1]*len(df), c=colors, edgecolors=edge_colors, s=50)
-    plt.xlabel('건반 번호 (Label)')
-    plt.title('88개 피아노 건반 분포')
-    plt.grid(True, alpha=0.3)
+    ax1.scatter(df['Label'], [1]*len(df), c=colors, edgecolors=edge_colors, s=50, rasterized=True)
+    ax1.set_xlabel('건반 번호 (Label)')
+    ax1.set_title('88개 피아노 건반 분포')
+    ax1.grid(True, alpha=0.3)
     
     # 서브플롯 2: 옥타브별 분포
-    plt.subplot(2, 2, 2)
     octave_counts = df['Octave'].value_counts().sort_index()
-    plt.bar(octave_counts.index, octave_counts.values)
-    plt.xlabel('옥타브')
-    plt.ylabel('건반 수')
-    plt.title('옥타브별 건반 분포')
+    ax2.bar(octave_counts.index, octave_counts.values)
+    ax2.set_xlabel('옥타브')
+    ax2.set_ylabel('건반 수')
+    ax2.set_title('옥타브별 건반 분포')
     
     # 서브플롯 3: 흑건/백건 분포
-    plt.subplot(2, 2, 3)
     key_type_counts = df['Key_Type'].value_counts()
-    plt.pie(key_type_counts.values, labels=['흑건', '백건'], autopct='%1.1f%%')
-    plt.title('흑건/백건 비율')
+    ax3.pie(key_type_counts.values, labels=['흑건', '백건'], autopct='%1.1f%%')
+    ax3.set_title('흑건/백건 비율')
     
     # 서브플롯 4: 라벨 연속성 확인
-    plt.subplot(2, 2, 4)
-    plt.plot(df['Label'], marker='o', markersize=2)
-    plt.xlabel('인덱스')
-    plt.ylabel('라벨 값')
-    plt.title('라벨 연속성 확인')
-    plt.grid(True, alpha=0.3)
-    
-    plt.tight_layout()
+    ax4.plot(df['Label'], marker='o', markersize=2, rasterized=True)
+    ax4.set_xlabel('인덱스')
+    ax4.set_ylabel('라벨 값')
+    ax4.set_title('라벨 연속성 확인')
+    ax4.grid(True, alpha=0.3)
+    
+    fig.tight_layout()
     plt.show()
 
-def validate_labeling():
+def validate_labeling(df=None):
     """
     라벨링의 정확성을 검증합니다.
+    이미 생성된 라벨링 DataFrame을 넘기면 다시 만들지 않고 그대로 사용합니다.
     """
-    df = create_labeling_dataframe()
+    df = df if df is not None else create_labeling_dataframe()
     
     print("=== 라벨링 검증 결과 ===")
     print(f"총 건반 수: {len(df)}")
     print(f"라벨 범위: {df['Label'].min()} ~ {df['Label'].max()}")
     print(f"중복 라벨 수: {df['Label'].duplicated().sum()}")
-    print(f"누락된 라벨: {set(range(88)) - set(df['Label'])}")
+    missing = np.setdiff1d(np.arange(88, dtype=np.int8), df['Label'].to_numpy())
+    print(f"누락된 라벨: {set(missing.tolist())}")
     
     # 중요한 음표들 확인
     important_notes = ['A0', 'C1', 'C4', 'A4', 'C8']
     print("\n=== 주요 음표 라벨링 확인 ===")
+    lookup = df.set_index('Note')['Label']  # 음표 → 라벨 인덱스 (한 번만 생성)
     for note in important_notes:
-        if note in df['Note'].values:
-            label = df[df['Note'] == note]['Label'].iloc[0]
-            print(f"{note}: {label}")
+        if note in lookup.index:
+            print(f"{note}: {lookup[note]}")
     
     return df
 
 def export_labeling_data(df, filename='piano_labeling.csv'):
     """
     라벨링 데이터를 CSV 파일로 내보냅니다.
+    값이 짧은 ASCII 문자열과 정수뿐이므로 pandas CSV writer 대신 np.savetxt로 바로 기록합니다.
     """
-    df.to_csv(filename, index=False, encoding='utf-8-sig')  # BOM 추가로 한글 깨짐 방지
+    # 정수 열은 %d, 나머지(음표 문자열)는 %s로 한 줄 포맷을 만듭니다.
+    fmt = ','.join('%d' if pd.api.types.is_integer_dtype(dtype) else '%s' for dtype in df.dtypes)
+    
+    with open(filename, 'w', encoding='utf-8-sig', newline='') as f:  # BOM 추가로 한글 깨짐 방지
+        f.write(','.join(df.columns) + '\n')
+        np.savetxt(f, df.to_records(index=False), fmt=fmt)
     print(f"라벨링 데이터가 '{filename}'로 저장되었습니다.")
 
 # 실행 예시
 if __name__ == "__main__":
-    # 라벨링 데이터 생성 및 검증
-    labeling_df = validate_labeling()
+    # 라벨링 데이터 생성 (한 번만 만들어 아래 단계에서 재사용)
+    labeling_df = create_labeling_dataframe()
+
+    # 라벨링 데이터 검증
+    validate_labeling(labeling_df)
     
     # 데이터프레임 출력 (처음 10개와 마지막 10개)
     print("\n=== 라벨링 데이터 샘플 ===")
@@ -174,14 +216,13 @@ if __name__ == "__main__":
     print(labeling_df.tail(10))
     
     # 시각화
-    visualize_piano_mapping()
+    visualize_piano_mapping(labeling_df)
     
     # CSV 파일로 저장
     export_labeling_data(labeling_df)
     
-    # 모델 학습용 딕셔너리 생성
-    note_to_label = dict(zip(labeling_df['Note'], labeling_df['Label']))
-    label_to_note = dict(zip(labeling_df['Label'], labeling_df['Note']))
+    # 모델 학습용 딕셔너리가 모듈 상수와 일치하는지 확인
+    assert build_label_maps() == (note_to_label, label_to_note), "모듈 상수 매핑을 갱신해야 합니다."
     
     print("\n=== 모델 학습용 매핑 딕셔너리 생성 완료 ===")
     print(f"note_to_label 딕셔너리 크기: {len(note_to_label)}")
@@ -1,6 +1,99 @@
 import subprocess
 import sys
 import os
+import tempfile
+import hashlib
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional
+
+# symusic은 MIDI 전처리(preprocess)를 사용할 때만 필요한 선택 의존성입니다.
+try:
+    import symusic
+except ImportError:
+    symusic = None
+
+# 실행 파일 경로는 모듈 로드 시 한 번만 찾아 두고, 호출마다 PATH를 다시 탐색하지 않습니다.
+FLUIDSYNTH = shutil.which("fluidsynth")
+FFMPEG = shutil.which("ffmpeg")
+
+def _require_binaries():
+    """
+    FluidSynth와 FFmpeg 실행 파일을 찾지 못했으면 변환을 시작하기 전에 오류를 냅니다.
+    """
+    missing = [name for name, path in (("fluidsynth", FLUIDSYNTH), ("ffmpeg", FFMPEG)) if path is None]
+    if missing:
+        raise RuntimeError(f"실행 파일을 PATH에서 찾을 수 없습니다: {', '.join(missing)}")
+
+def _render_mp3(midi_path, soundfont_path, output_mp3_path, sample_rate, vbr_qscale):
+    """
+    FluidSynth → FFmpeg 파이프라인을 실행하여 MIDI 파일을 MP3로 변환합니다.
+    """
+    _require_binaries()
+
+    # 2)  FluidSynth 명령: MIDI → WAV (표준 출력으로)
+    fluidsynth_cmd = [
+        FLUIDSYNTH,
+        "-ni",                      # 대화형 모드 없이 렌더링
+        "-F", "-",                  # 렌더링 결과를 표준 출력으로 내보냄
+        "-T", "wav",                # 출력 형식 (파일 확장자로 추정할 수 없으므로 명시)
+        "-O", "s16",                # 16비트 정수 PCM (MP3 인코딩에는 충분하며 파이프 전송량을 줄임)
+        "-r", str(sample_rate),     # 샘플레이트
+        soundfont_path,             # SoundFont(.sf2) 경로
+        midi_path                    # MIDI 파일 경로
+    ]
+
+    # 3)  FFmpeg 명령: 표준 입력의 WAV → MP3
+    ffmpeg_cmd = [
+        FFMPEG,
+        "-y",                        # 기존 파일 덮어쓰기
+        "-f", "wav",                 # 입력 형식
+        "-i", "pipe:0",              # 표준 입력에서 WAV 읽기
+        "-codec:a", "libmp3lame",    # LAME MP3 인코더 사용
+        "-qscale:a", str(vbr_qscale),# VBR 품질 설정
+        output_mp3_path              # 출력 MP3 파일 경로
+    ]
+    print("▶ FluidSynth 명령 실행:", " ".join(fluidsynth_cmd))
+    print("▶ FFmpeg 명령 실행:", " ".join(ffmpeg_cmd))
+
+    # FluidSynth의 stderr는 임시 파일로 받아, 파이프 버퍼가 가득 차 멈추는 일이 없도록 합니다.
+    with tempfile.TemporaryFile() as fluidsynth_err:
+        fluidsynth_proc = subprocess.Popen(fluidsynth_cmd, stdout=subprocess.PIPE, stderr=fluidsynth_err)
+        ffmpeg_proc = subprocess.Popen(
+            ffmpeg_cmd, stdin=fluidsynth_proc.stdout, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )  # FFmpeg의 stdout은 쓰지 않으므로 버퍼링 없이 버리고, 오류 확인용 stderr만 받습니다.
+        # 부모 프로세스 쪽 파이프를 닫아야 FFmpeg가 먼저 종료될 때 FluidSynth도 SIGPIPE를 받습니다.
+        fluidsynth_proc.stdout.close()
+        _, ffmpeg_stderr = ffmpeg_proc.communicate()
+        fluidsynth_proc.wait()
+        fluidsynth_err.seek(0)
+        fluidsynth_stderr = fluidsynth_err.read()
+
+    # FFmpeg가 먼저 실패하면 FluidSynth는 파이프가 끊겨 함께 실패하므로, FFmpeg 오류를 먼저 확인합니다.
+    if ffmpeg_proc.returncode != 0:
+        print("Error: FFmpeg 실행 중 오류가 발생했습니다.")
+        print(ffmpeg_stderr.decode("utf-8", errors="ignore"))
+        raise subprocess.CalledProcessError(ffmpeg_proc.returncode, ffmpeg_cmd, stderr=ffmpeg_stderr)
+    if fluidsynth_proc.returncode != 0:
+        print("Error: FluidSynth 실행 중 오류가 발생했습니다.")
+        print(fluidsynth_stderr.decode("utf-8", errors="ignore"))
+        raise subprocess.CalledProcessError(fluidsynth_proc.returncode, fluidsynth_cmd, stderr=fluidsynth_stderr)
+
+
+def _conversion_stamp(midi_path, soundfont_path, sample_rate, vbr_qscale):
+    """
+    변환 결과를 결정하는 입력(MIDI 내용, SoundFont 파일, 변환 옵션)으로 캐시 식별 값을 만듭니다.
+    SoundFont는 용량이 크므로 내용 대신 경로·크기·수정 시각으로 식별합니다.
+    """
+    sf_stat = os.stat(soundfont_path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(midi_path, "rb") as f:
+        digest.update(f.read())
+    digest.update(
+        f"{os.path.abspath(soundfont_path)}|{sf_stat.st_size}|{sf_stat.st_mtime_ns}|{sample_rate}|{vbr_qscale}".encode()
+    )
+    return digest.hexdigest()
+
 
 def midi_to_mp3(
     midi_path: str,
@@ -8,17 +101,22 @@ def midi_to_mp3(
     output_mp3_path: str,
     sample_rate: int = 44100,
     vbr_qscale: int = 2,
-    keep_wav: bool = False
+    preprocess: Optional[Callable[["symusic.Score"], "symusic.Score"]] = None
 ):
     """
-    MIDI 파일을 FluidSynth로 WAV로 렌더링한 뒤, FFmpeg로 MP3로 인코딩하는 함수.
+    MIDI 파일을 FluidSynth로 렌더링한 뒤, FFmpeg로 MP3로 인코딩하는 함수.
+    FluidSynth의 WAV 출력을 파이프로 FFmpeg에 바로 넘기므로 중간 WAV 파일을 디스크에 만들지 않습니다.
 
     :param midi_path: 변환할 MIDI 파일 전체 경로 (예: "D:\\songs\\example.mid")
     :param soundfont_path: 사용할 SoundFont 파일 전체 경로 (예: "D:\\SoundFonts\\FluidR3_GM.sf2")
     :param output_mp3_path: 최종 생성될 MP3 파일 전체 경로 (예: "D:\\songs\\example.mp3")
     :param sample_rate: FluidSynth로 렌더링할 때 사용할 샘플레이트 (기본 44100)
     :param vbr_qscale: FFmpeg로 MP3 인코딩 시 사용할 VBR 품질 값 (0~9, 작을수록 고음질. 기본 2)
-    :param keep_wav: 중간에 생성된 WAV 파일을 남길지 여부 (기본 False → 생성 후 삭제)
+    :param preprocess: 렌더링 전에 MIDI를 수정할 함수 (symusic.Score → symusic.Score, 예: 조옮김·템포 정규화).
+                       symusic 패키지가 필요합니다. (기본 None → 원본 MIDI 그대로 렌더링)
+
+    같은 입력·옵션으로 이미 변환된 MP3가 있으면(.stamp 파일로 확인) 다시 변환하지 않고 바로 반환합니다.
+    preprocess를 사용할 때는 결과를 캐시하지 않습니다.
     """
 
     # 1) 입력 경로·출력 경로 유효성 검사
@@ -32,65 +130,142 @@ def midi_to_mp3(
     if mp3_dir and not os.path.isdir(mp3_dir):
         os.makedirs(mp3_dir, exist_ok=True)
 
-    # 중간 WAV 파일 경로를 설정 (MP3와 같은 디렉터리에, 같은 이름의 .wav)
-    base_name = os.path.splitext(os.path.basename(midi_path))[0]
-    wav_path = os.path.join(mp3_dir, base_name + ".wav")
+    return _convert_midi(midi_path, soundfont_path, output_mp3_path, sample_rate, vbr_qscale, preprocess)
 
-    # 2)  FluidSynth 호출: MIDI → WAV
-    fluidsynth_cmd = [
-        "fluidsynth",
-        "-ni",                      # 대화형 모드 없이 렌더링
-        "-F", wav_path,             # 출력 WAV 파일 경로
-        "-r", str(sample_rate),     # 샘플레이트
-        soundfont_path,             # SoundFont(.sf2) 경로
-        midi_path                    # MIDI 파일 경로
-    ]
-    print("▶ FluidSynth 명령 실행:", " ".join(fluidsynth_cmd))
-    try:
-        subprocess.run(fluidsynth_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except subprocess.CalledProcessError as e:
-        print("Error: FluidSynth 실행 중 오류가 발생했습니다.")
-        print(e.stderr.decode("utf-8", errors="ignore"))
-        raise
 
-    # 생성된 WAV 파일이 정상적으로 만들어졌는지 확인
-    if not os.path.isfile(wav_path):
-        raise FileNotFoundError(f"WAV 파일 생성에 실패했습니다. 예상 경로: {wav_path}")
-    print(f"✓ WAV 파일 생성 완료: {wav_path}")
+def _convert_midi(midi_path, soundfont_path, output_mp3_path, sample_rate, vbr_qscale, preprocess):
+    """
+    입력 검증과 출력 폴더 생성이 끝났다고 보고 MIDI 파일 하나를 MP3로 변환합니다.
+    midi_to_mp3_batch는 검증을 한 번에 미리 하므로, 작업 프로세스에서는 이 함수를 바로 호출합니다.
+    """
+    # 이전 변환 결과가 최신이면 FluidSynth/FFmpeg 실행을 건너뜁니다.
+    stamp_path = output_mp3_path + ".stamp"
+    stamp = None
+    if preprocess is None:
+        stamp = _conversion_stamp(midi_path, soundfont_path, sample_rate, vbr_qscale)
+        if os.path.isfile(output_mp3_path) and os.path.isfile(stamp_path):
+            with open(stamp_path, "r", encoding="ascii") as f:
+                if f.read().strip() == stamp:
+                    print(f"✓ 이미 변환된 MP3 파일 사용: {output_mp3_path}")
+                    return output_mp3_path
 
-    # 3)  FFmpeg 호출: WAV → MP3
-    ffmpeg_cmd = [
-        "ffmpeg",
-        "-y",                        # 기존 파일 덮어쓰기
-        "-i", wav_path,              # 입력 WAV 파일
-        "-codec:a", "libmp3lame",    # LAME MP3 인코더 사용
-        "-qscale:a", str(vbr_qscale),# VBR 품질 설정
-        output_mp3_path              # 출력 MP3 파일 경로
-    ]
-    print("▶ FFmpeg 명령 실행:", " ".join(ffmpeg_cmd))
-    try:
-        subprocess.run(ffmpeg_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except subprocess.CalledProcessError as e:
-        print("Error: FFmpeg 실행 중 오류가 발생했습니다.")
-        print(e.stderr.decode("utf-8", errors="ignore"))
-        raise
+    # 변환 도중 실패해도 불완전한 MP3가 캐시로 쓰이지 않도록, 기존 기록은 먼저 지웁니다.
+    if os.path.isfile(stamp_path):
+        os.remove(stamp_path)
+
+    if preprocess is None:
+        _render_mp3(midi_path, soundfont_path, output_mp3_path, sample_rate, vbr_qscale)
+    else:
+        if symusic is None:
+            raise ImportError("preprocess를 사용하려면 symusic 패키지가 필요합니다: pip install symusic")
+
+        # symusic(C++ 코어)으로 MIDI를 읽어 수정한 뒤, 임시 MIDI 파일로 저장하여 렌더링합니다.
+        score = preprocess(symusic.Score(midi_path))
+        fd, tmp_midi_path = tempfile.mkstemp(suffix=".mid")
+        os.close(fd)
+        try:
+            score.dump_midi(tmp_midi_path)
+            _render_mp3(tmp_midi_path, soundfont_path, output_mp3_path, sample_rate, vbr_qscale)
+        finally:
+            os.remove(tmp_midi_path)
 
     # mp3 파일이 정상 생성되었는지 확인
     if not os.path.isfile(output_mp3_path):
         raise FileNotFoundError(f"MP3 파일 생성에 실패했습니다. 예상 경로: {output_mp3_path}")
     print(f"✓ MP3 파일 생성 완료: {output_mp3_path}")
 
-    # 4) 중간 WAV 파일 삭제 여부 결정
-    if not keep_wav:
-        try:
-            os.remove(wav_path)
-            print(f"✓ 중간 WAV 파일 삭제 완료: {wav_path}")
-        except Exception as e:
-            print(f"⚠️ 중간 WAV 파일 삭제 중 오류: {e}")
+    # 다음 실행에서 재사용할 수 있도록 변환 입력의 식별 값을 기록합니다.
+    if stamp is not None:
+        with open(stamp_path, "w", encoding="ascii") as f:
+            f.write(stamp)
 
     return output_mp3_path
 
 
+def default_mp3_path(midi_path: str) -> str:
+    """
+    MIDI 파일과 같은 폴더에, 확장자만 .mp3로 바꾼 출력 경로를 돌려줍니다.
+    """
+    base_name = os.path.splitext(os.path.basename(midi_path))[0]
+    return os.path.join(os.path.dirname(midi_path), base_name + ".mp3")
+
+
+def _validate_inputs(midi_paths, soundfont_path):
+    """
+    일괄 변환 전에 입력 파일을 한 번씩만 검사하고, 출력 폴더를 폴더마다 한 번씩만 생성합니다.
+
+    :return: ([(MIDI 경로, MP3 경로), ...] 변환할 작업 목록, 찾을 수 없는 {MIDI 경로: 예외} 딕셔너리)
+    """
+    # SoundFont는 모든 파일이 공유하므로 한 번만 확인합니다.
+    if not os.path.isfile(soundfont_path):
+        raise FileNotFoundError(f"SoundFont 파일을 찾을 수 없습니다: {soundfont_path}")
+
+    jobs = []
+    failed = {}
+    for midi_path in dict.fromkeys(midi_paths):  # 중복 경로 제거 (순서 유지)
+        if not os.path.isfile(midi_path):
+            ex = FileNotFoundError(f"MIDI 파일을 찾을 수 없습니다: {midi_path}")
+            print(f"!!! 변환 중 오류 발생 ({midi_path}): {ex}")
+            failed[midi_path] = ex
+            continue
+        jobs.append((midi_path, default_mp3_path(midi_path)))
+
+    # mp3 파일이 생성될 폴더가 없다면, 폴더마다 한 번만 생성
+    for mp3_dir in {os.path.dirname(output_mp3_path) for _, output_mp3_path in jobs}:
+        if mp3_dir:
+            os.makedirs(mp3_dir, exist_ok=True)
+
+    return jobs, failed
+
+
+def midi_to_mp3_batch(
+    midi_paths,
+    soundfont_path: str,
+    sample_rate: int = 44100,
+    vbr_qscale: int = 2,
+    max_workers: int = None,
+    preprocess: Optional[Callable[["symusic.Score"], "symusic.Score"]] = None
+):
+    """
+    여러 MIDI 파일을 프로세스 풀에서 병렬로 MP3로 변환하는 함수.
+    각 작업 프로세스가 자신의 FluidSynth/FFmpeg 프로세스를 실행하므로 CPU 코어 수만큼 동시에 렌더링됩니다.
+
+    :param midi_paths: 변환할 MIDI 파일 경로 목록
+    :param soundfont_path: 사용할 SoundFont 파일 전체 경로
+    :param sample_rate: FluidSynth로 렌더링할 때 사용할 샘플레이트 (기본 44100)
+    :param vbr_qscale: FFmpeg로 MP3 인코딩 시 사용할 VBR 품질 값 (기본 2)
+    :param max_workers: 동시에 실행할 프로세스 수 (기본 None → os.cpu_count())
+    :param preprocess: midi_to_mp3의 preprocess와 같음. 작업 프로세스로 넘겨야 하므로 모듈 최상위 함수여야 합니다.
+    :return: (성공한 {MIDI 경로: MP3 경로} 딕셔너리, 실패한 {MIDI 경로: 예외} 딕셔너리)
+    """
+    converted = {}
+
+    _require_binaries()
+    if preprocess is not None and symusic is None:
+        raise ImportError("preprocess를 사용하려면 symusic 패키지가 필요합니다: pip install symusic")
+
+    # 입력 검증과 출력 폴더 생성은 파일마다 반복하지 않고 여기서 한 번에 처리합니다.
+    jobs, failed = _validate_inputs(midi_paths, soundfont_path)
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = {
+            executor.submit(
+                _convert_midi, midi_path, soundfont_path, output_mp3_path,
+                sample_rate, vbr_qscale, preprocess
+            ): midi_path
+            for midi_path, output_mp3_path in jobs
+        }
+        for future in as_completed(futures):
+            midi_path = futures[future]
+            try:
+                converted[midi_path] = future.result()
+            except Exception as ex:
+                print(f"!!! 변환 중 오류 발생 ({midi_path}): {ex}")
+                failed[midi_path] = ex
+
+    return converted, failed
+
+
 if __name__ == "__main__":
     # 예시: 커맨드라인 인수로 MIDI 경로를 받아 변환하려면 다음과 같이 사용합니다.
     # python midi_to_mp3.py "D:\songs\example.mid"
@@ -99,17 +274,28 @@ if __name__ == "__main__":
     # 추가로 sys.argv를 읽어서 동적으로 처리할 수도 있습니다.
 
     if len(sys.argv) < 2:
-        print("사용법: python midi_to_mp3.py <MIDI 파일 전체 경로>")
+        print("사용법: python midi_to_mp3.py <MIDI 파일 전체 경로> [<MIDI 파일 전체 경로> ...]")
         sys.exit(1)
 
-    midi_file = sys.argv[1]
+    midi_files = sys.argv[1:]
     # 필요하다면 명령행 인수로 SoundFont 경로도 받도록 수정할 수 있습니다.
     soundfont_file = r"D:\SoundFonts\FluidR3_GM.sf2"
 
+    # 여러 파일이 주어지면 병렬로 일괄 변환합니다.
+    if len(midi_files) > 1:
+        converted, failed = midi_to_mp3_batch(
+            midi_files,
+            soundfont_path=soundfont_file,
+            sample_rate=44100,
+            vbr_qscale=2
+        )
+        print(f"\n=== 일괄 변환 완료: 성공 {len(converted)}개, 실패 {len(failed)}개 ===")
+        sys.exit(1 if failed else 0)
+
+    midi_file = midi_files[0]
+
     # 결과 MP3 파일을 저장할 경로 (MIDI와 동일한 폴더, 확장자만 .mp3로 바꿈)
-    base_name = os.path.splitext(os.path.basename(midi_file))[0]
-    output_folder = os.path.dirname(midi_file)
-    output_mp3 = os.path.join(output_folder, base_name + ".mp3")
+    output_mp3 = default_mp3_path(midi_file)
 
     try:
         result = midi_to_mp3(
@@ -117,8 +303,7 @@ if __name__ == "__main__":
             soundfont_path=soundfont_file,
             output_mp3_path=output_mp3,
             sample_rate=44100,
-            vbr_qscale=2,
-            keep_wav=False    # True로 하면 WAV를 삭제하지 않습니다.
+            vbr_qscale=2
         )
         print(f"\n=== 변환 성공: {result} ===")
     except Exception as ex: